@@ -1,18 +1,13 @@
 import streamlit as st
-from openai import OpenAI
 from dotenv import load_dotenv
 import os
-from bs4 import BeautifulSoup
-import requests
-import time
+from typing import Iterator
+from seo_core import Website, analyze_with_openai, report_filename
 
 # Load environment variables and setup
 load_dotenv()
 openai_api_key = os.getenv("OPENAI_API_KEY")
 
-# Initialize OpenAI client
-client = OpenAI()
-
 # Page configuration
 st.set_page_config(
     page_title="Website SEO Analyzer",
@@ -32,31 +27,8 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-# Headers for web requests
-headers = {
-    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/117.0.0.0 Safari/537.36"
-}
-
-class Website:
-    def __init__(self, url):
-        self.url = url
-        try:
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
-            self.title = soup.title.string if soup.title else "No title found"
-            
-            # Clean up the HTML
-            for irrelevant in soup.body(["script", "style", "img", "input"]) if soup.body else []:
-                irrelevant.decompose()
-            
-            self.text = soup.body.get_text(separator="\n", strip=True) if soup.body else ""
-        except Exception as e:
-            raise Exception(f"Error fetching website: {str(e)}")
-
-def analyze_website(url: str) -> str:
-    # System prompt for SEO analysis
-    system_prompt = """You are an SEO Expert and Web Development Engineer that analyzes the contents of a website 
+# System prompt for SEO analysis
+SYSTEM_PROMPT = """You are an SEO Expert and Web Development Engineer that analyzes the contents of a website 
     and provides a detailed analysis on the status of SEO and how to improve the SEO vitals, ignoring text that might be navigation related. 
     Structure your response in the following sections:
     1. Overall SEO Score (0-100)
@@ -69,28 +41,16 @@ def analyze_website(url: str) -> str:
     8. Check any other factors that might affect the SEO of the website.
     Respond in markdown format."""
 
-    try:
-        website = Website(url)
-        
-        user_prompt = f"""You are analyzing a website titled: {website.title}
+USER_TEMPLATE = """You are analyzing a website titled: {title}
         URL: {url}
         
         Please analyze the following content and provide a comprehensive SEO analysis:
         
-        {website.text}"""
+        {content}"""
 
-        response = client.chat.completions.create(
-            model="gpt-4",  # Updated to use correct model name
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=0.7
-        )
-        
-        return response.choices[0].message.content
-    except Exception as e:
-        raise Exception(f"Analysis failed: {str(e)}")
+def analyze_website(url: str) -> Iterator[str]:
+    website = Website(url)
+    yield from analyze_with_openai(website, openai_api_key, SYSTEM_PROMPT, USER_TEMPLATE)
 
 # Main app interface
 def main():
@@ -112,20 +72,19 @@ def main():
     # Analysis section
     if analyze_button and url:
         try:
+            status = st.empty()
             with st.spinner("🔄 Analyzing website... This may take a minute..."):
-                analysis_result = analyze_website(url)
+                # Display results in an expander as they are generated
+                with st.expander("📊 View Detailed Analysis", expanded=True):
+                    analysis_result = st.write_stream(analyze_website(url))
                 
-            st.success("✅ Analysis completed successfully!")
-            
-            # Display results in an expander
-            with st.expander("📊 View Detailed Analysis", expanded=True):
-                st.markdown(analysis_result)
+            status.success("✅ Analysis completed successfully!")
                 
             # Add download button for the analysis
             st.download_button(
                 label="📥 Download Analysis Report",
                 data=analysis_result,
-                file_name=f"seo_analysis_{url.replace('https://', '').replace('http://', '').replace('/', '_')}.md",
+                file_name=report_filename(url),
                 mime="text/markdown"
             )
             
@@ -1,11 +1,14 @@
 import streamlit as st
-from openai import OpenAI
 from dotenv import load_dotenv
 import os
-from bs4 import BeautifulSoup
-import requests
-import time
-import json
+from seo_core import (
+    Website,
+    analyze_with_ollama,
+    analyze_with_openai,
+    check_ollama_availability,
+    clear_caches,
+    report_filename,
+)
 
 # Must be the first Streamlit command
 st.set_page_config(
@@ -14,271 +17,28 @@ st.set_page_config(
     layout="wide"
 )
 
+@st.cache_data(show_spinner=False)
+def _css() -> str:
+    """Read the app stylesheet once; the tag is still emitted every rerun so it persists"""
+    with open(os.path.join(os.path.dirname(__file__), "styles.css"), encoding="utf-8") as f:
+        return f"<style>\n{f.read()}</style>"
+
 # Hide the CSS code from showing up
-st.markdown("""
-    <style>
-        @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;600&display=swap');
-        
-        /* Hide default elements */
-        #MainMenu {visibility: hidden;}
-        footer {visibility: hidden;}
-        .stDeployButton {display: none;}
-        header {visibility: hidden;}
-        
-        /* Main app styling */
-        .stApp {
-            background: linear-gradient(120deg, #6B5B95 0%, #45B7D1 100%);
-        }
-        
-        /* Dark grey sidebar */
-        [data-testid="stSidebar"] {
-            background-color: rgba(51, 51, 51, 0.95) !important;
-            backdrop-filter: blur(10px);
-            padding: 2rem 1rem;
-        }
-        
-        /* Input box styling with better contrast */
-        .stTextInput > div > div > input {
-            background: rgba(255, 255, 255, 0.15) !important;
-            border: 2px solid rgba(255, 255, 255, 0.3) !important;
-            padding: 0.75rem 1rem !important;
-            color: white !important;
-            border-radius: 8px !important;
-            font-size: 1.1rem !important;
-            font-family: 'Inter', sans-serif !important;
-            backdrop-filter: blur(10px);
-            transition: all 0.3s ease;
-        }
-        
-        .stTextInput > div > div > input:focus {
-            border-color: rgba(255, 255, 255, 0.5) !important;
-            background: rgba(255, 255, 255, 0.2) !important;
-            box-shadow: 0 0 0 2px rgba(255, 255, 255, 0.1);
-        }
-        
-        .stTextInput > div > div > input::placeholder {
-            color: rgba(255, 255, 255, 0.7) !important;
-        }
-        
-        /* Download button styling with better contrast */
-        .stDownloadButton > button {
-            background: linear-gradient(90deg, #45B7D1 0%, #6B5B95 100%) !important;
-            color: white !important;
-            border: none !important;
-            padding: 0.75rem 2rem !important;
-            border-radius: 8px !important;
-            font-weight: 600 !important;
-            font-size: 1rem !important;
-            font-family: 'Inter', sans-serif !important;
-            transition: all 0.3s ease;
-            box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-            backdrop-filter: blur(10px);
-            margin-top: 1rem !important;
-        }
-        
-        .stDownloadButton > button:hover {
-            transform: translateY(-2px);
-            box-shadow: 0 6px 12px rgba(0, 0, 0, 0.15);
-            background: linear-gradient(90deg, #3DA1B8 0%, #5A4C7E 100%) !important;
-        }
-        
-        /* Analysis button styling */
-        .stButton > button {
-            background: linear-gradient(90deg, #6B5B95 0%, #45B7D1 100%) !important;
-            color: white !important;
-            border: none !important;
-            padding: 0.75rem 2rem !important;
-            border-radius: 8px !important;
-            font-weight: 600 !important;
-            font-size: 1.1rem !important;
-            transition: all 0.3s ease;
-            box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-            width: auto !important;
-            min-width: 200px;
-        }
-        
-        .stButton > button:hover {
-            transform: translateY(-2px);
-            box-shadow: 0 6px 12px rgba(0, 0, 0, 0.15);
-            background: linear-gradient(90deg, #5A4C7E 0%, #3DA1B8 100%) !important;
-        }
-        
-        /* Expander styling with better contrast */
-        .streamlit-expanderHeader {
-            background: rgba(255, 255, 255, 0.15) !important;
-            border: 1px solid rgba(255, 255, 255, 0.3) !important;
-            color: white !important;
-            border-radius: 8px !important;
-            backdrop-filter: blur(10px);
-        }
-        
-        /* Results container styling */
-        .stExpander {
-            background: rgba(255, 255, 255, 0.1) !important;
-            border-radius: 8px !important;
-            padding: 1rem !important;
-            backdrop-filter: blur(10px);
-        }
-        
-        /* Typography */
-        h1, h2, h3, p, li, label {
-            color: white !important;
-        }
-        
-        /* Remove empty spaces */
-        .css-1544g2n {
-            padding: 0 !important;
-            margin: 0 !important;
-        }
-        
-        .css-1y4p8pa {
-            padding: 0 !important;
-            margin: 0 !important;
-        }
-        
-        /* Main title styling */
-        h1:first-of-type {
-            margin-bottom: 0.5rem !important;
-        }
-        
-        /* Subtitle styling */
-        h3:first-of-type {
-            margin-bottom: 2rem !important;
-            opacity: 0.9;
-        }
-        
-        /* Add spacing between elements */
-        .stTextInput {
-            margin-bottom: 2rem !important;
-        }
-        
-        /* Help text styling */
-        .stTextInput > div > small {
-            color: rgba(255, 255, 255, 0.8) !important;
-            font-size: 0.9rem !important;
-            margin-top: 0.5rem !important;
-        }
-    </style>
-""", unsafe_allow_html=True)
+st.markdown(_css(), unsafe_allow_html=True)
 
 # Load environment variables
 load_dotenv()
 
-# Constants
-OLLAMA_API = "http://localhost:11434/api/generate"
-OLLAMA_HEADERS = {"Content-Type": "application/json"}
-OLLAMA_MODEL = "llama3.2:latest"
-WEB_HEADERS = {
-    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/117.0.0.0 Safari/537.36"
-}
-
-def check_ollama_availability():
-    """Check if Ollama server is available and the model is loaded"""
-    try:
-        # First check if the server is running
-        response = requests.get("http://localhost:11434/api/tags")
-        if response.status_code != 200:
-            return False
-            
-        # Then test with a simple prompt to ensure the model works
-        test_payload = {
-            "model": OLLAMA_MODEL,
-            "prompt": "hi",
-            "stream": False
-        }
-        
-        response = requests.post(OLLAMA_API, json=test_payload, headers=OLLAMA_HEADERS)
-        return response.status_code == 200
-        
-    except requests.exceptions.RequestException:
-        return False
-
 def init_session_state():
     """Initialize session state variables"""
     if 'api_key' not in st.session_state:
         st.session_state.api_key = None
     if 'api_source' not in st.session_state:
         st.session_state.api_source = None
-
-class Website:
-    def __init__(self, url):
-        self.url = url
-        try:
-            response = requests.get(url, headers=WEB_HEADERS, timeout=10)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
-            self.title = soup.title.string if soup.title else "No title found"
-            
-            # Clean up the HTML
-            for irrelevant in soup.body(["script", "style", "img", "input"]) if soup.body else []:
-                irrelevant.decompose()
-            
-            self.text = soup.body.get_text(separator="\n", strip=True) if soup.body else ""
-        except Exception as e:
-            raise Exception(f"Error fetching website: {str(e)}")
-
-def analyze_with_ollama(website: Website) -> str:
-    """Analyze website using Ollama"""
-    system_prompt = """You are an SEO Expert and Web Development Engineer. Analyze the website content and provide a detailed SEO analysis with these sections:
-    1. Overall SEO Score (0-100)
-    2. Key Findings
-    3. Critical Issues
-    4. Recommendations
-    5. Technical Details
-    6. Mobile-friendly Analysis
-    7. Performance Analysis
-    8. Additional SEO Factors
-    Respond in markdown format."""
-
-    full_prompt = f"{system_prompt}\n\nAnalyzing website: {website.title}\nURL: {website.url}\n\nContent:\n{website.text}"
-    
-    payload = {
-        "model": OLLAMA_MODEL,
-        "prompt": full_prompt,
-        "stream": False
-    }
-
-    try:
-        response = requests.post(OLLAMA_API, json=payload, headers=OLLAMA_HEADERS)
-        
-        # Add detailed error logging
-        st.sidebar.write(f"Status Code: {response.status_code}")
-        st.sidebar.write(f"Response Headers: {dict(response.headers)}")
-        st.sidebar.write(f"Response Text: {response.text[:500]}...")  # First 500 chars
-        
-        response.raise_for_status()
-        return response.json()['response']
-    except Exception as e:
-        st.sidebar.error(f"Full error details: {str(e)}")
-        raise Exception(f"Ollama analysis failed: {str(e)}")
-
-def analyze_with_openai(website: Website, api_key: str) -> str:
-    """Analyze website using OpenAI"""
-    client = OpenAI(api_key=api_key)
-    
-    system_prompt = """You are an SEO Expert and Web Development Engineer. Analyze the website content and provide a detailed SEO analysis with these sections:
-    1. Overall SEO Score (0-100)
-    2. Key Findings
-    3. Critical Issues
-    4. Recommendations
-    5. Technical Details
-    6. Mobile-friendly Analysis
-    7. Performance Analysis
-    8. Additional SEO Factors
-    Respond in markdown format."""
-
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"Analyzing website: {website.title}\nURL: {website.url}\n\nContent:\n{website.text}"}
-            ],
-            temperature=0.7
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        raise Exception(f"OpenAI analysis failed: {str(e)}")
+    if 'analysis' not in st.session_state:
+        st.session_state.analysis = None
+    if 'debug_notes' not in st.session_state:
+        st.session_state.debug_notes = []
 
 def render_api_selection():
     """Render API selection interface"""
@@ -304,31 +64,36 @@ def render_api_selection():
             api_key = st.sidebar.text_input("Enter OpenAI API Key", type="password")
             st.session_state.api_key = api_key
     else:  # Ollama
+        if st.sidebar.button("🔄 Recheck Ollama"):
+            check_ollama_availability.clear()
         if not check_ollama_availability():
             st.sidebar.error("⚠️ Ollama server not detected. Please ensure Ollama is running locally.")
         else:
             st.sidebar.success("✅ Ollama server detected")
     
     st.session_state.api_source = api_source
-
-def main():
-    # Initialize session state
-    init_session_state()
-    
-    # Render API selection sidebar
-    render_api_selection()
-
-    # Main content
-    st.title("🔍 Website SEO Analyzer")
-    st.markdown("### AI-powered SEO analysis using OpenAI or Ollama")
     
-    # Input section
-    url = st.text_input(
-        "Enter website URL",
-        placeholder="https://example.com",
-        help="Enter the full URL including https:// or http://"
+    st.sidebar.checkbox(
+        "Force refresh",
+        key="force_refresh",
+        help="Ignore cached pages and analyses and fetch everything again"
     )
-    
+    st.sidebar.checkbox(
+        "Debug logging",
+        key="debug",
+        help="Show raw Ollama response details below the analysis"
+    )
+
+def render_debug_notes():
+    """Show the debug details recorded during the last analysis"""
+    if st.session_state.get('debug') and st.session_state.debug_notes:
+        with st.expander("🐞 Debug details"):
+            for note in st.session_state.debug_notes:
+                st.text(note)
+
+@st.fragment
+def _analysis_fragment(url: str):
+    """Analysis controls and results; reruns on its own without rebuilding the rest of the page"""
     col1, col2, col3 = st.columns([2, 1, 2])
     with col2:
         analyze_button = st.button("🚀 Analyze Website", use_container_width=True)
@@ -343,34 +108,40 @@ def main():
             st.error("❌ Ollama server is not available")
             return
 
+        if st.session_state.get('force_refresh'):
+            clear_caches()
+        st.session_state.debug_notes = []
+
         try:
+            status = st.empty()
             with st.spinner("🔄 Analyzing website... This may take a minute..."):
                 website = Website(url)
                 if st.session_state.api_source == "OpenAI":
-                    analysis_result = analyze_with_openai(website, st.session_state.api_key)
+                    analysis_stream = analyze_with_openai(website, st.session_state.api_key)
                 else:
-                    analysis_result = analyze_with_ollama(website)
+                    analysis_stream = analyze_with_ollama(website)
                 
-            st.success("✅ Analysis completed successfully!")
-            
-            # Display results
-            with st.expander("📊 View Detailed Analysis", expanded=True):
-                st.markdown(analysis_result)
-            
-            # Download button
-            st.download_button(
-                label="📥 Download Analysis Report",
-                data=analysis_result,
-                file_name=f"seo_analysis_{url.replace('https://', '').replace('http://', '').replace('/', '_')}.md",
-                mime="text/markdown"
-            )
+                # Display results as they are generated
+                with st.expander("📊 View Detailed Analysis", expanded=True):
+                    analysis_result = st.write_stream(analysis_stream)
+                
+            status.success("✅ Analysis completed successfully!")
+            render_debug_notes()
+            # Keep the report so fragment reruns (e.g. the download click) can redraw it
+            st.session_state.analysis = (url, analysis_result)
             
         except Exception as e:
             st.error(f"❌ Error: {str(e)}")
             st.info("💡 Please check the URL and try again.")
-    
-    # Footer - only show if no analysis is being displayed
-    if not analyze_button or not url:
+            render_debug_notes()
+            return
+    elif url and st.session_state.analysis and st.session_state.analysis[0] == url:
+        analysis_result = st.session_state.analysis[1]
+        st.success("✅ Analysis completed successfully!")
+        with st.expander("📊 View Detailed Analysis", expanded=True):
+            st.markdown(analysis_result)
+    else:
+        # Footer - only show if no analysis is being displayed
         st.markdown("### How it works")
         st.markdown("""
         1. Select your preferred AI provider (OpenAI or Ollama)
@@ -380,6 +151,35 @@ def main():
         5. Get detailed SEO analysis
         6. Download the report
         """)
+        return
+    
+    # Download button
+    st.download_button(
+        label="📥 Download Analysis Report",
+        data=analysis_result,
+        file_name=report_filename(url),
+        mime="text/markdown"
+    )
+
+def main():
+    # Initialize session state
+    init_session_state()
+    
+    # Render API selection sidebar
+    render_api_selection()
+
+    # Main content
+    st.title("🔍 Website SEO Analyzer")
+    st.markdown("### AI-powered SEO analysis using OpenAI or Ollama")
+    
+    # Input section
+    url = st.text_input(
+        "Enter website URL",
+        placeholder="https://example.com",
+        help="Enter the full URL including https:// or http://"
+    )
+    
+    _analysis_fragment(url)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,293 @@
+"""Shared scraping and analysis logic for the Streamlit SEO apps"""
+import streamlit as st
+from openai import OpenAI
+from bs4 import BeautifulSoup
+from selectolax.lexbor import LexborHTMLParser
+import requests
+import httpx
+import tiktoken
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import re
+import itertools
+import json
+import hashlib
+import logging
+from typing import Callable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# Constants
+OLLAMA_API = "http://localhost:11434/api/generate"
+OLLAMA_TAGS_API = "http://localhost:11434/api/tags"
+OLLAMA_HEADERS = {"Content-Type": "application/json"}
+OLLAMA_MODEL = "llama3.2:latest"
+# Upper bound on page tokens sent to the model, keeps prompt size and latency predictable
+MAX_CONTENT_TOKENS = 6000
+# Upper bound on characters per token; text past MAX_CONTENT_TOKENS * this is never tokenized
+CHARS_PER_TOKEN_BOUND = 8
+# No Accept-Encoding override: requests already asks for gzip/deflate, and adds br
+# itself only when brotli is installed to decode it
+WEB_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/117.0.0.0 Safari/537.36"
+}
+
+SYSTEM_PROMPT = """You are an SEO Expert and Web Development Engineer. Analyze the website content and provide a detailed SEO analysis with these sections:
+    1. Overall SEO Score (0-100)
+    2. Key Findings
+    3. Critical Issues
+    4. Recommendations
+    5. Technical Details
+    6. Mobile-friendly Analysis
+    7. Performance Analysis
+    8. Additional SEO Factors
+    Respond in markdown format."""
+
+USER_TEMPLATE = "Analyzing website: {title}\nURL: {url}\n\nContent:\n{content}"
+
+def _build_session(session_headers: dict) -> requests.Session:
+    """Create a pooled HTTP session with retries on transient gateway errors"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=20,
+        pool_maxsize=20,
+        max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update(session_headers)
+    return session
+
+# Separate pools for websites and the local Ollama server. Imported modules are
+# not re-executed on Streamlit reruns, so these live for the whole process.
+SESSION = _build_session(WEB_HEADERS)
+OLLAMA_SESSION = _build_session(OLLAMA_HEADERS)
+
+@st.cache_data(ttl=30, show_spinner=False)
+def check_ollama_availability() -> bool:
+    """Check if Ollama server is available and the model is loaded"""
+    try:
+        # The tags listing answers both questions without running the model
+        response = OLLAMA_SESSION.get(OLLAMA_TAGS_API, timeout=5)
+        if response.status_code != 200:
+            return False
+        
+        models = {model["name"] for model in response.json().get("models", [])}
+        return OLLAMA_MODEL in models
+        
+    except (requests.exceptions.RequestException, ValueError, KeyError):
+        return False
+
+# Matches the charset in a Content-Type header and in <meta charset> / http-equiv tags
+_CHARSET_RE = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.IGNORECASE)
+
+def _find_charset(text: Optional[str]) -> Optional[str]:
+    """Charset named in a header or markup snippet, or None when there is none"""
+    match = _CHARSET_RE.search(text or "")
+    return match.group(1) if match else None
+
+def _page_charset(content: bytes, declared: Optional[str]) -> Optional[str]:
+    """The header charset, or else a <meta charset> near the top of the page as browsers do"""
+    return declared or _find_charset(content[:2048].decode("ascii", errors="ignore"))
+
+def _decode(content: bytes, charset: Optional[str]) -> str:
+    """Decode page bytes once so neither parser has to guess the encoding"""
+    try:
+        return content.decode(charset or "utf-8", errors="replace")
+    except LookupError:
+        return content.decode("utf-8", errors="replace")
+
+def _parse_html(content: bytes, charset: Optional[str] = None) -> tuple[str, str]:
+    """Extract the (title, text) pair from raw page bytes"""
+    # lexbor reads bytes as UTF-8, so pages in any other declared charset are decoded first
+    charset = _page_charset(content, charset)
+    if charset and charset.lower() not in ("utf-8", "utf8"):
+        markup = _decode(content, charset)
+    else:
+        markup = content
+    try:
+        tree = LexborHTMLParser(markup)
+        title_node = tree.css_first('title')
+        title = title_node.text() if title_node else "No title found"
+        
+        # Clean up the HTML
+        tree.strip_tags(["script", "style", "img", "input", "nav", "header", "footer", "noscript", "svg", "iframe"])
+        
+        text = tree.body.text(separator="\n", strip=True) if tree.body else ""
+    except Exception:
+        # Fall back to BeautifulSoup if selectolax cannot handle the markup
+        soup = BeautifulSoup(_decode(content, charset), 'lxml')
+        title = soup.title.get_text() if soup.title else "No title found"
+        
+        for irrelevant in soup.select("script, style, img, input, nav, header, footer, noscript, svg, iframe"):
+            irrelevant.decompose()
+        
+        text = soup.body.get_text(separator="\n", strip=True) if soup.body else ""
+    
+    return title, text
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def fetch_site(url: str) -> tuple[str, str]:
+    """Fetch a page and return its (title, text), cached per URL across reruns"""
+    with SESSION.get(url, timeout=(3.05, 10), stream=True) as response:
+        response.raise_for_status()
+        # Read at most 32 x 64KB (~2MB) so oversized pages are cut off early
+        content = b"".join(itertools.islice(response.iter_content(65536), 0, 32))
+        charset = _find_charset(response.headers.get("Content-Type"))
+    
+    return _parse_html(content, charset)
+
+class Website:
+    def __init__(self, url):
+        self.url = url
+        try:
+            self.title, self.text = fetch_site(url)
+        except Exception as e:
+            raise Exception(f"Error fetching website: {str(e)}")
+
+@st.cache_resource(show_spinner=False)
+def _encoder() -> tiktoken.Encoding:
+    """GPT-4 tokenizer, loaded once per process"""
+    return tiktoken.encoding_for_model("gpt-4")
+
+def _truncate_to_budget(text: str) -> str:
+    """Cut page text to MAX_CONTENT_TOKENS on a token boundary"""
+    enc = _encoder()
+    ids = enc.encode(text[:MAX_CONTENT_TOKENS * CHARS_PER_TOKEN_BOUND], disallowed_special=())
+    return enc.decode(ids[:MAX_CONTENT_TOKENS])
+
+def _content_hash(text: str) -> str:
+    """Short, stable digest used to key cached analyses without storing secrets"""
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+@st.cache_resource(ttl=24 * 3600)
+def _analysis_cache() -> dict:
+    """Completed analyses keyed by provider, model, system prompt and content hash"""
+    return {}
+
+def _stream_cached(key: tuple, start_stream: Callable[[], Iterator[str]]) -> Iterator[str]:
+    """Replay a cached analysis, or stream a fresh one and cache it once complete"""
+    cache = _analysis_cache()
+    if key in cache:
+        yield cache[key]
+        return
+
+    parts = []
+    for chunk in start_stream():
+        parts.append(chunk)
+        yield chunk
+    cache[key] = "".join(parts)
+
+def _debug_note(message: str):
+    """Record a debug detail for the page to show; code run from an st.fragment may not write to st.sidebar"""
+    if st.session_state.get('debug'):
+        st.session_state.setdefault('debug_notes', []).append(message)
+
+def _ollama_stream(full_prompt: str) -> Iterator[str]:
+    """Stream generated text from Ollama as it is produced"""
+    payload = {
+        "model": OLLAMA_MODEL,
+        "prompt": full_prompt,
+        "stream": True
+    }
+
+    response = OLLAMA_SESSION.post(OLLAMA_API, json=payload, stream=True)
+    
+    logger.debug("Ollama response headers: %s", response.headers)
+    
+    # Add detailed error logging when enabled from the sidebar
+    _debug_note(f"Status Code: {response.status_code}")
+    if not response.ok:
+        # Reading the body of a successful response here would defeat streaming
+        _debug_note(f"Response Text: {response.content[:500].decode('utf-8', 'replace')}...")  # First 500 bytes
+    
+    response.raise_for_status()
+    for line in response.iter_lines():
+        if line:
+            yield json.loads(line).get("response", "")
+
+# One client per API key so the HTTPS connection to the API is reused across calls
+_openai_clients: dict[str, OpenAI] = {}
+
+def _openai_client(api_key: str) -> OpenAI:
+    """Return the persistent OpenAI client for an API key, creating it on first use"""
+    client = _openai_clients.get(api_key)
+    if client is None:
+        client = _openai_clients[api_key] = OpenAI(
+            api_key=api_key,
+            timeout=60,
+            max_retries=2,
+            http_client=httpx.Client(limits=httpx.Limits(max_keepalive_connections=5, max_connections=10))
+        )
+    return client
+
+def _openai_stream(system: str, user: str, api_key: str) -> Iterator[str]:
+    """Stream completion deltas from OpenAI as they are produced"""
+    client = _openai_client(api_key)
+    response = client.chat.completions.create(
+        model="gpt-4",
+        messages=[
+            {"role": "system", "content": system},
+            {"role": "user", "content": user}
+        ],
+        temperature=0.7,
+        stream=True
+    )
+    for chunk in response:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+def analyze_with_ollama(website: Website) -> Iterator[str]:
+    """Analyze website using Ollama, streaming the report"""
+    trimmed = _truncate_to_budget(website.text)
+    full_prompt = "".join([
+        SYSTEM_PROMPT,
+        "\n\nAnalyzing website: ", website.title,
+        "\nURL: ", website.url,
+        "\n\nContent:\n", trimmed
+    ])
+    prompt_hash = _content_hash(website.url + website.text)
+
+    try:
+        key = ("ollama", OLLAMA_MODEL, SYSTEM_PROMPT, prompt_hash)
+        yield from _stream_cached(key, lambda: _ollama_stream(full_prompt))
+    except Exception as e:
+        logger.exception("Ollama analysis failed")
+        _debug_note(f"Full error details: {str(e)}")
+        raise Exception(f"Ollama analysis failed: {str(e)}")
+
+def analyze_with_openai(
+    website: Website,
+    api_key: str,
+    system_prompt: str = SYSTEM_PROMPT,
+    user_template: str = USER_TEMPLATE
+) -> Iterator[str]:
+    """Analyze website using OpenAI, streaming the report
+
+    user_template is filled in with the page's title, url and (truncated) content.
+    """
+    trimmed = _truncate_to_budget(website.text)
+    user_prompt = user_template.format(title=website.title, url=website.url, content=trimmed)
+    prompt_hash = _content_hash(website.url + website.text)
+
+    try:
+        # Only a digest of the API key takes part in the cache key
+        key = ("openai", "gpt-4", system_prompt, user_template, prompt_hash, _content_hash(api_key or ""))
+        yield from _stream_cached(key, lambda: _openai_stream(system_prompt, user_prompt, api_key))
+    except Exception as e:
+        raise Exception(f"OpenAI analysis failed: {str(e)}")
+
+# Drops the URL scheme and replaces anything unsafe in a file name, in one pass
+_FN_RE = re.compile(r'^(https?://)|[^\w.-]')
+
+def _fn_replace(match: re.Match) -> str:
+    return "" if match.group(1) else "_"
+
+def report_filename(url: str) -> str:
+    """Name of the downloadable markdown report for a URL"""
+    return f"seo_analysis_{_FN_RE.sub(_fn_replace, url)}.md"
+
+def clear_caches():
+    """Forget cached pages and analyses so the next run starts fresh"""
+    fetch_site.clear()
+    _analysis_cache.clear()
\ No newline at end of file
@@ -1,8 +1,20 @@
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 from dotenv import load_dotenv
 import os
-from bs4 import BeautifulSoup
+import sys
+from selectolax.lexbor import LexborHTMLParser
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import asyncio
+import httpx
+import tiktoken
+import diskcache
+import hashlib
+import re
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 load_dotenv()
 
@@ -17,18 +29,36 @@ elif openai_api_key.strip() != openai_api_key:
 else:
     print("API key found and looks good so far!")
 
-client = OpenAI()
-
-message = """Hello, GPT! This is my first ever message to you! Hi!"""
+# One HTTP/2 connection pool for async page fetches and async LLM calls alike
+async_http = httpx.AsyncClient(
+    http2=True,
+    limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+    timeout=10.0,
+    follow_redirects=True,
+)
 
-response = client.chat.completions.create(
-    model="gpt-4o-mini",
-    messages=[{"role": "user", "content": message}],
-    temperature=0.5,
-    max_tokens=1000,
+# Synchronous LLM calls keep their TLS session alive on a tuned HTTP/2 pool
+http_client = httpx.Client(
+    http2=True,
+    limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+    timeout=httpx.Timeout(60.0, connect=5.0),
 )
 
-print(response.choices[0].message.content)
+client = OpenAI(http_client=http_client)
+# The SDK would otherwise inherit the 10s page-fetch timeout from async_http
+async_client = AsyncOpenAI(http_client=async_http, timeout=httpx.Timeout(60.0, connect=5.0))
+
+def selftest():
+    message = """Hello, GPT! This is my first ever message to you! Hi!"""
+
+    response = client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[{"role": "user", "content": message}],
+        temperature=0.5,
+        max_tokens=1000,
+    )
+
+    print(response.choices[0].message.content)
 
 # A class to represent a Webpage
 # If you're not familiar with Classes, check out the "Intermediate Python" notebook
@@ -38,21 +68,127 @@ headers = {
  "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/117.0.0.0 Safari/537.36"
 }
 
+# Reuse keep-alive connections across Website fetches instead of a new TCP+TLS setup per URL
+SESSION = requests.Session()
+SESSION.headers.update(headers)
+adapter = HTTPAdapter(pool_connections=64, pool_maxsize=64, max_retries=Retry(total=3, backoff_factor=0.2))
+SESSION.mount('http://', adapter)
+SESSION.mount('https://', adapter)
+
+# Parsed pages with their validators, so unchanged pages come back as a cheap 304
+PAGE_CACHE = diskcache.Cache('.page_cache')
+
+# Pages are cut off past this size so huge or hostile responses can't blow up memory and parse time
+MAX_PAGE_BYTES = 2_000_000
+
+def read_capped(chunks):
+    buf = bytearray()
+    for chunk in chunks:
+        buf.extend(chunk)
+        if len(buf) > MAX_PAGE_BYTES:
+            break
+    return bytes(buf)
+
+# lexbor is UTF-8 native, so bytes go straight in unless the server (or, failing that, a
+# <meta charset> near the top of the page) declares another charset; decoding with the
+# declared charset up front skips any guessing on the page bytes
+CHARSET_RE = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.IGNORECASE)
+
+def parser_input(content, content_type):
+    match = CHARSET_RE.search(content_type or '') or CHARSET_RE.search(content[:2048].decode('ascii', errors='ignore'))
+    if match is None or match.group(1).lower() in ('utf-8', 'utf8'):
+        return content
+    try:
+        return content.decode(match.group(1), errors='replace')
+    except LookupError:
+        return content
+
+# Media types worth parsing; anything else (PDFs, images, ...) is skipped before download
+HTML_TYPES = ('text/html', 'application/xhtml+xml')
+
+def is_html(content_type):
+    return (content_type or '').split(';', 1)[0].strip().lower() in HTML_TYPES
+
+# Token budget for page text in the prompt; the encoder is loaded once at import
+MAX_TOKENS = 4000
+# Upper bound on characters per token; text past MAX_TOKENS * this is never tokenized
+CHARS_PER_TOKEN_BOUND = 8
+ENCODING = tiktoken.encoding_for_model('gpt-4o-mini')
+
+def truncate_tokens(text):
+    ids = ENCODING.encode(text[:MAX_TOKENS * CHARS_PER_TOKEN_BOUND], disallowed_special=())
+    return ENCODING.decode(ids[:MAX_TOKENS])
+
+# Text nodes are joined with a control character that never occurs in page text, so the
+# regex only touches the whitespace around node boundaries (what strip=True drops, blank
+# nodes included) and leaves newlines inside a node, e.g. in <pre>, alone
+NODE_SEP = '\x1f'
+WHITESPACE_RE = re.compile(r'\s*\x1f\s*')
+
 class Website:
+    __slots__ = ('url', 'title', 'text', 'user_prompt')
 
-    def __init__(self, url):
+    def __init__(self, url, html=None):
         """
-        Create this Website object from the given url using the BeautifulSoup library
+        Create this Website object from the given url using the selectolax (lexbor) parser.
+        Pass html if the page was already downloaded to skip the fetch.
         """
         self.url = url
-        response = requests.get(url, headers=headers)
-        soup = BeautifulSoup(response.content, 'html.parser')
-        self.title = soup.title.string if soup.title else "No title found"
-        for irrelevant in soup.body(["script", "style", "img", "input"]):
-            irrelevant.decompose()
-        self.text = soup.body.get_text(separator="\n", strip=True)
+        response = None
+        if html is None:
+            cached = PAGE_CACHE.get(url)
+            validators = {}
+            if cached is not None:
+                if cached["etag"]:
+                    validators["If-None-Match"] = cached["etag"]
+                if cached["last_modified"]:
+                    validators["If-Modified-Since"] = cached["last_modified"]
+            with SESSION.get(url, headers=validators, stream=True, timeout=(3.05, 10)) as response:
+                if cached is not None and response.status_code == 304:
+                    self.title, self.text = cached["title"], cached["text"]
+                else:
+                    # Error pages are HTML too; don't parse, summarize and pay for them
+                    response.raise_for_status()
+                    if not is_html(response.headers.get('Content-Type')):
+                        raise ValueError(f"{url} did not return an HTML page")
+                    html = parser_input(read_capped(response.iter_content(65536)), response.headers.get('Content-Type'))
+        if html is not None:
+            tree = LexborHTMLParser(html)
+            title = tree.css_first('title')
+            self.title = title.text() if title else "No title found"
+            tree.strip_tags(['script', 'style', 'img', 'input'])
+            # One regex sweep instead of stripping every text node in Python
+            self.text = WHITESPACE_RE.sub("\n", tree.body.text(separator=NODE_SEP)).strip()
+            if response is not None and response.status_code == 200:
+                PAGE_CACHE.set(url, {
+                    "title": self.title,
+                    "text": self.text,
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                })
+        self.text = truncate_tokens(self.text)
+        # Built once here in a single f-string; every later prompt reuses it
+        self.user_prompt = f"You are looking at a website titled {self.title}\n The contents of this website is as follows; \
+please provide a short summary and vitals related to the SEO of this website in markdown. \
+Include practical and relevant recommendations or errors if you find them, and also summarize these too.\n\n{self.text}"
 
-myWebsite = Website("https://fitnessfuelhub.com")
+    @classmethod
+    async def fetch(cls, url):
+        """
+        Download the page on the shared HTTP/2 client and parse it off the event loop
+        """
+        async with async_http.stream("GET", url, headers=headers) as response:
+            response.raise_for_status()
+            if not is_html(response.headers.get('Content-Type')):
+                raise ValueError(f"{url} did not return an HTML page")
+            buf = bytearray()
+            async for chunk in response.aiter_bytes(65536):
+                buf.extend(chunk)
+                if len(buf) > MAX_PAGE_BYTES:
+                    break
+        html = parser_input(bytes(buf), response.headers.get('Content-Type'))
+        # Parsing is CPU work, keep it off the event loop
+        return await asyncio.to_thread(cls, url, html)
 
 # Define  our system prompt - you can experiment with this later, changing the last sentence to 'Respond in markdown in Spanish."
 
@@ -61,36 +197,226 @@ and provides a short summary on the status of SEO and how to improve the SEO vit
 Respond in markdown."
 
 def user_prompt_for(website):
-    user_prompt = f"You are looking at a website titled {website.title}"
-    user_prompt += "\n The contents of this website is as follows; \
-please provide a short summary and vitals related to the SEO of this website in markdown. \
-Include practical and relevant recommendations or errors if you find them, and also summarize these too.\n\n"
-    user_prompt += website.text
-    return user_prompt
+    return website.user_prompt
 
-user_prompt = user_prompt_for(myWebsite)
-
-# print(user_prompt)
+# The system message never changes, so every request shares this one dict
+SYSTEM_MSG = {"role": "system", "content": system_prompt}
 
 def messages_for(website):
-    return [
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": user_prompt_for(website)}
-    ]
+    return [SYSTEM_MSG, {"role": "user", "content": website.user_prompt}]
+
+# Completed summaries are kept on disk so repeat runs on unchanged pages skip the LLM call
+CACHE = diskcache.Cache('.llm_cache')
+
+def cache_key_for(model, messages):
+    prompt = "|".join(message["content"] for message in messages)
+    return hashlib.sha256(f"{model}|{prompt}".encode()).hexdigest()
+
+# Yields the summary as it is generated, so output starts at first-token latency
+def stream_summary(website):
+    model = "gpt-4o-mini"
+    messages = messages_for(website)
+    key = cache_key_for(model, messages)
+    cached = CACHE.get(key)
+    if cached is not None:
+        yield cached
+        return
+    response = client.chat.completions.create(
+        model = model,
+        messages = messages,
+        stream = True
+    )
+    parts = []
+    for chunk in response:
+        if chunk.choices and chunk.choices[0].delta.content:
+            parts.append(chunk.choices[0].delta.content)
+            yield chunk.choices[0].delta.content
+    CACHE.set(key, "".join(parts), expire=86400 * 7)
+
+def summarize_website(website):
+    return "".join(stream_summary(website))
 
 def summarize(url):
-    website = Website(url)
+    return summarize_website(Website(url))
+
+# Thread-pool batch for callers that can't use asyncio: LLM work on the first parsed
+# page starts while the other pages are still downloading
+EXECUTOR = ThreadPoolExecutor(max_workers=16)
+
+# The batch helpers return (summaries, failures), both keyed by URL, so one bad
+# page (a PDF, a 404, ...) is reported instead of sinking the rest of the batch
+
+def summarize_batch(urls):
+    fetches = {EXECUTOR.submit(Website, url): url for url in urls}
+    jobs, failures = {}, {}
+    for future in as_completed(fetches):
+        url = fetches[future]
+        try:
+            jobs[url] = EXECUTOR.submit(summarize_website, future.result())
+        except Exception as e:
+            failures[url] = str(e)
+    summaries = {}
+    for url in urls:
+        if url in jobs:
+            try:
+                summaries[url] = jobs[url].result()
+            except Exception as e:
+                failures[url] = str(e)
+    return summaries, failures
+
+def fetch_websites(urls):
+    futures = {url: EXECUTOR.submit(Website, url) for url in urls}
+    websites, failures = [], {}
+    for url, future in futures.items():
+        try:
+            websites.append(future.result())
+        except Exception as e:
+            failures[url] = str(e)
+    return websites, failures
+
+# Fewer LLM round-trips for several sites: pack a handful into one completion, or hand a
+# larger set to the Batch API, which bills at half price in exchange for a delayed answer
+
+# One completion only stays reliable for a handful of pages; more belong in the Batch API
+MAX_COMBINED_SITES = 5
+
+def summarize_combined(urls):
+    if len(urls) > MAX_COMBINED_SITES:
+        raise ValueError(f"summarize_combined takes at most {MAX_COMBINED_SITES} URLs, got {len(urls)}; use summarize_via_batch_api")
+    websites, failures = fetch_websites(urls)
+    if not websites:
+        return {}, failures
+    sites = "\n\n".join(f"=== {website.url} ===\n{website.user_prompt}" for website in websites)
     response = client.chat.completions.create(
         model = "gpt-4o-mini",
-        messages = messages_for(website)
+        messages = [
+            {"role": "system", "content": system_prompt + " Reply with a JSON object mapping each site URL to its markdown summary."},
+            {"role": "user", "content": sites}
+        ],
+        response_format = {"type": "json_object"}
     )
-    return response.choices[0].message.content
+    summaries = json.loads(response.choices[0].message.content)
+    expected = {website.url for website in websites}
+    if set(summaries) != expected:
+        raise ValueError(
+            f"Combined reply does not match the requested sites; "
+            f"missing {sorted(expected - set(summaries))}, unexpected {sorted(set(summaries) - expected)}"
+        )
+    return summaries, failures
+
+def batch_error(result):
+    response = result.get("response") or {}
+    error = result.get("error") or (response.get("body") or {}).get("error") or {}
+    return error.get("message") or f"request failed with status {response.get('status_code')}"
+
+def summarize_via_batch_api(urls, poll_seconds=30):
+    model = "gpt-4o-mini"
+    summaries = {}
+    pending = []
+    websites, failures = fetch_websites(urls)
+    for website in websites:
+        messages = messages_for(website)
+        key = cache_key_for(model, messages)
+        cached = CACHE.get(key)
+        if cached is not None:
+            summaries[website.url] = cached
+        else:
+            pending.append((website.url, messages, key))
+    if not pending:
+        return summaries, failures
+
+    lines = [
+        json.dumps({
+            "custom_id": str(i),
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {"model": model, "messages": messages}
+        })
+        for i, (url, messages, key) in enumerate(pending)
+    ]
+    batch_file = client.files.create(file=("summaries.jsonl", "\n".join(lines).encode()), purpose="batch")
+    batch = client.batches.create(input_file_id=batch_file.id, endpoint="/v1/chat/completions", completion_window="24h")
+    while batch.status not in ("completed", "failed", "expired", "cancelled"):
+        time.sleep(poll_seconds)
+        batch = client.batches.retrieve(batch.id)
+    if batch.status != "completed":
+        raise RuntimeError(f"Batch {batch.id} finished with status {batch.status}")
 
-from IPython.display import Markdown
+    # Successful lines land in the output file and failed ones in the error file;
+    # either file is missing when no line went that way
+    if batch.output_file_id:
+        for line in client.files.content(batch.output_file_id).text.splitlines():
+            result = json.loads(line)
+            url, messages, key = pending[int(result["custom_id"])]
+            if (result.get("response") or {}).get("status_code") != 200:
+                failures[url] = batch_error(result)
+                continue
+            summary = result["response"]["body"]["choices"][0]["message"]["content"]
+            CACHE.set(key, summary, expire=86400 * 7)
+            summaries[url] = summary
+    if batch.error_file_id:
+        for line in client.files.content(batch.error_file_id).text.splitlines():
+            result = json.loads(line)
+            failures[pending[int(result["custom_id"])][0]] = batch_error(result)
+    for url, messages, key in pending:
+        if url not in summaries and url not in failures:
+            failures[url] = "no result in batch output"
+    return summaries, failures
+
+# Async versions for summarizing many URLs at once; fetches and LLM calls overlap
+
+async def summarize_async(semaphore, url):
+    async with semaphore:
+        website = await Website.fetch(url)
+        model = "gpt-4o-mini"
+        messages = messages_for(website)
+        key = cache_key_for(model, messages)
+        cached = CACHE.get(key)
+        if cached is not None:
+            return cached
+        response = await async_client.chat.completions.create(
+            model = model,
+            messages = messages
+        )
+        summary = response.choices[0].message.content
+        CACHE.set(key, summary, expire=86400 * 7)
+        return summary
+
+async def summarize_many(urls):
+    semaphore = asyncio.Semaphore(20)  # cap concurrent requests
+    results = await asyncio.gather(*(summarize_async(semaphore, url) for url in urls), return_exceptions=True)
+    summaries, failures = {}, {}
+    for url, result in zip(urls, results):
+        if isinstance(result, BaseException):
+            failures[url] = str(result)
+        else:
+            summaries[url] = result
+    return summaries, failures
+
+from IPython.display import Markdown, display
 
 def display_summary(url):
-    summary = summarize(url)
-    return Markdown(summary)
+    # Re-render the notebook output as chunks arrive instead of waiting for the full summary
+    handle = display(Markdown(""), display_id=True)
+    summary = ""
+    for chunk in stream_summary(Website(url)):
+        summary += chunk
+        handle.update(Markdown(summary))
+
+if __name__ == "__main__":
+    # The "Hello, GPT!" ping costs a round-trip and tokens, so it only runs on request
+    if "--selftest" in sys.argv:
+        selftest()
 
-summary = summarize(myWebsite.url)
-print(summary)
\ No newline at end of file
+    # URLs come from the command line; several at once take the concurrent async path
+    urls = [arg for arg in sys.argv[1:] if not arg.startswith("--")] or ["https://fitnessfuelhub.com"]
+    if len(urls) == 1:
+        for chunk in stream_summary(Website(urls[0])):
+            print(chunk, end='', flush=True)
+        print()
+    else:
+        summaries, failures = asyncio.run(summarize_many(urls))
+        for url, summary in summaries.items():
+            print(f"=== {url} ===\n{summary}\n")
+        for url, error in failures.items():
+            print(f"Skipped {url}: {error}", file=sys.stderr)
\ No newline at end of file